@@ -3,6 +3,12 @@ import uuid
 import os
 import time
 
+# Use libyaml's C loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
 class ConfigHandler:
     def __init__(self):
         self.config = None
@@ -36,7 +42,7 @@ class ConfigHandler:
         """Load configuration file"""
         try:
             with open(self.config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
+                self.config = yaml.load(f, Loader=YamlLoader)
                 print("Loaded config:", self.config)  # Debug print
             
             print(f"Current MAC: {self.current_mac}")  # Debug print
@@ -103,7 +109,7 @@ class ConfigHandler:
         """Save current config to file"""
         try:
             with open(self.config_path, 'w') as f:
-                yaml.safe_dump(self.config, f, default_flow_style=False)
+                yaml.dump(self.config, f, Dumper=YamlDumper, default_flow_style=False)
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
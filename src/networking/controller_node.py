@@ -3,15 +3,21 @@ import websockets
 import json
 import uuid
 import time
+import math
 import socket
 import os
 import yaml
-import numpy as np
 from src.core.machine_controller import MachineController
 from src.core.states import MachineState
 from src.core.config_handler import ConfigHandler
 from datetime import datetime
 
+# Use libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 class ControllerNode(MachineController):
     def __init__(self, controller_name, port=8765):
         # Load config first
@@ -57,7 +63,7 @@ class ControllerNode(MachineController):
         try:
             config_path = os.path.join('config', 'controllers.yaml')
             with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=YamlLoader)
         except Exception as e:
             print(f"Error loading config: {e}")
             return None
@@ -217,7 +223,7 @@ class ControllerNode(MachineController):
         try:
             if max_value <= min_value:
                 return 20
-            log_scaled = np.log1p(raw_movement - min_value) / np.log1p(max_value - min_value)
+            log_scaled = math.log1p(raw_movement - min_value) / math.log1p(max_value - min_value)
             scaled = int(round(20 + log_scaled * (127 - 20)))
             return max(20, min(127, scaled))
         except Exception as e:
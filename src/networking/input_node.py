@@ -9,6 +9,12 @@ import cv2
 import matplotlib.pyplot as plt
 import yaml
 
+# Use libyaml's C loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
 class InputNode:
     def __init__(self):
         self.config = self._load_config()
@@ -22,7 +28,7 @@ class InputNode:
         try:
             config_path = os.path.join('config', 'controllers.yaml')
             with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=YamlLoader)
         except Exception as e:
             print(f"Error loading config: {e}")
             return None
@@ -50,7 +56,7 @@ class InputNode:
                                  'config', 'controllers.yaml')
         try:
             with open(config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
+                self.config = yaml.load(f, Loader=YamlLoader)
             
             print("\nDiscovering controllers...")
             for name, details in self.config['controllers'].items():
@@ -74,7 +80,7 @@ class InputNode:
             
             # Save updated config
             with open(config_path, 'w') as f:
-                yaml.safe_dump(self.config, f, default_flow_style=False)
+                yaml.dump(self.config, f, Dumper=YamlDumper, default_flow_style=False)
                 
         except Exception as e:
             print(f"Error discovering controllers: {e}")
@@ -8,6 +8,12 @@ from pathlib import Path
 from lib.STservo_sdk.sts import *
 from lib.STservo_sdk.port_handler import PortHandler
 
+# Use libyaml's C loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
 class ServoController:
     """Controls servos via Waveshare Serial Bus Servo Driver Board"""
     
@@ -34,7 +40,7 @@ class ServoController:
         """Load servo configuration"""
         config_path = os.path.join(self.project_root, 'config', 'controllers.yaml')
         with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
             
     def save_position(self, servo_id: int, angle: float):
         """Save servo position in degrees to config file"""
@@ -43,7 +49,7 @@ class ServoController:
         
         config_path = os.path.join(self.project_root, 'config', 'controllers.yaml')
         with open(config_path, 'w') as f:
-            yaml.dump(self.config, f, default_flow_style=False)
+            yaml.dump(self.config, f, Dumper=YamlDumper, default_flow_style=False)
             
     def degrees_to_units(self, degrees: float) -> int:
         """Convert degrees to servo units (500-2500)"""
@@ -160,7 +166,7 @@ class OutputNode:
         """Load servo configuration"""
         config_path = os.path.join(Path(__file__).parent.parent.parent, 'config', 'controllers.yaml')
         with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
             
     def start(self):
         """Start all controllers"""
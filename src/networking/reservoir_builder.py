@@ -2,16 +2,22 @@ import asyncio
 import pandas as pd
 import os
 import glob
+import math
 import yaml
 import json
 import websockets
 from datetime import datetime
 from pathlib import Path
 from src.networking.input_node import InputNode
-import numpy as np
 import traceback
 from enum import Enum
 
+# Use libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 class BuilderState(Enum):
     IDLE = "IDLE"
     SENDING_DATA = "SENDING_DATA"
@@ -41,7 +47,7 @@ class ReservoirModelBuilder:
         config_path = Path(__file__).parent.parent.parent / 'config' / 'controllers.yaml'
         try:
             with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=YamlLoader)
         except Exception as e:
             print(f"Error loading config: {e}")
             return None
@@ -128,7 +134,7 @@ class ReservoirModelBuilder:
                 return 127
                 
             # Apply logarithmic scaling
-            log_scaled = np.log1p(raw_movement - min_value) / np.log1p(max_value - min_value)
+            log_scaled = math.log1p(raw_movement - min_value) / math.log1p(max_value - min_value)
             # log_scaled will be between 0 and 1
             
             # Scale to [20, 127] range
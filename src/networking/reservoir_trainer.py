@@ -9,6 +9,12 @@ from enum import Enum
 import numpy as np
 from pathlib import Path
 
+# Use libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 class TrainerState(Enum):
     IDLE = "IDLE"
     RECEIVING_DATA = "RECEIVING_DATA"
@@ -60,7 +66,7 @@ class ReservoirTrainer:
         try:
             config_path = os.path.join('config', 'controllers.yaml')
             with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=YamlLoader)
         except Exception as e:
             print(f"Error loading config: {e}")
             return None
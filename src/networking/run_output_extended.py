@@ -14,6 +14,12 @@ from pathlib import Path
 import pytz  # For Venice timezone
 import argparse
 
+# Use libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 class OutputState(Enum):
     IDLE = auto()
     PREDICT = auto()
@@ -398,7 +404,7 @@ class OutputController:
         config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'controllers.yaml')
         try:
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=YamlLoader)
                 servo_config = config.get('servo_config', {})
                 main_controller = servo_config.get('controllers', {}).get('main', {})
                 servos = main_controller.get('servos', {})
@@ -551,7 +557,7 @@ class OutputController:
             
             try:
                 with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
+                    config = yaml.load(f, Loader=YamlLoader)
                 print("Config loaded successfully")
             except Exception as e:
                 print(f"Failed to load config: {e}")
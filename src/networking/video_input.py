@@ -2,19 +2,39 @@ import cv2
 import numpy as np
 from typing import Optional, Dict, Tuple
 import time
+import math
 import yt_dlp
 import yaml
 import os
+import sys
+import traceback
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 import csv
 import pytz  # Added for timezone handling
 import websockets  # Add this import at the top
-import json
+from websockets.protocol import State
+import orjson
 import asyncio
 import threading
 import queue
+from collections import deque
+from itertools import islice
+import logging
+import logging.handlers
+
+# Numba is optional; without it the OpenCV threshold/count path is used
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Use libyaml's C loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
 
 # Use cocoa backend for Mac, xcb for Linux
 # if os.uname().sysname == 'Darwin':  # macOS
@@ -22,6 +42,121 @@ import queue
 # else:  # Linux
 #     os.environ['QT_QPA_PLATFORM'] = 'xcb'
 
+logger = logging.getLogger(__name__)
+
+# Overlay font and BGR colors
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_WHITE = (255, 255, 255)
+_GREEN = (0, 255, 0)
+_RED = (0, 0, 255)
+_DARK_GRAY = (50, 50, 50)
+
+# Let FFmpeg pick a hardware decoder when this OpenCV build supports it (4.5.2+);
+# it falls back to software decoding on its own when none is available
+if hasattr(cv2, 'VIDEO_ACCELERATION_ANY'):
+    _CAPTURE_PARAMS = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+else:
+    _CAPTURE_PARAMS = None
+
+# Radians per second of the day, for the sin/cos time encoding
+_DAY_SECONDS_TO_RAD = 2.0 * math.pi / 86400.0
+
+# websockets before 10.0 calls connection handlers with an extra path argument
+_WS_MAJOR = int(websockets.__version__.split('.')[0])
+
+# Options for the ACK server, shared by the normal and alternate-port binds
+_ACK_SERVE_KWARGS = dict(
+    ping_interval=None,
+    ping_timeout=None,
+    close_timeout=10,
+    max_size=10485760,
+    max_queue=32,
+    reuse_address=True  # Allow reuse of address
+)
+
+# The ACK receipt never changes, so encode it once instead of per acknowledgment
+_ACK_RECEIPT = orjson.dumps({
+    'type': 'ack_receipt',
+    'status': 'success',
+    'message': 'Acknowledgment received successfully'
+}).decode()
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _count_changed_pixels(a, b, threshold):
+        """Count pixels where two uint8 images differ by more than threshold"""
+        count = 0
+        for i in prange(a.shape[0]):
+            row_count = 0
+            for j in range(a.shape[1]):
+                if abs(int(a[i, j]) - int(b[i, j])) > threshold:
+                    row_count += 1
+            count += row_count
+        return count
+else:
+    _count_changed_pixels = None
+
+async def _send_quietly(websocket, message):
+    """Send a best-effort message, ignoring a closed or failing connection"""
+    try:
+        await websocket.send(message)
+    except Exception:
+        pass
+
+def install_uvloop():
+    """Use uvloop for asyncio if it is installed; returns True when active"""
+    # uvloop has no Windows build, so stay on the default loop there
+    if sys.platform == 'win32':
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+def _read_config_cache(cache_path, config_stat):
+    """Return the cached parsed config if it was made from this exact YAML file"""
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if cached.get('mtime_ns') != config_stat.st_mtime_ns or cached.get('size') != config_stat.st_size:
+        return None
+    return cached.get('config')
+
+def _write_config_cache(cache_path, config_stat, config):
+    """Store the parsed config as JSON next to the YAML; failures just skip caching"""
+    try:
+        # Dates and non-string keys would not round-trip through JSON; those raise here
+        payload = orjson.dumps({
+            'mtime_ns': config_stat.st_mtime_ns,
+            'size': config_stat.st_size,
+            'config': config
+        }, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError):
+        pass
+
+def setup_logging(debug=False):
+    """Send log records through a queue so stream writes happen off the event loop thread"""
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    # Debug output only for this module; libraries like websockets log every frame at DEBUG
+    logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    listener.start()
+    return listener
+
 class VideoInput:
     def __init__(self):
         self.stream = None
@@ -30,23 +165,51 @@ class VideoInput:
         self.last_frame = None
         self.is_running = False
         self.config = self.load_config()
+        self._config_hash = hash(repr(self.config))  # Matches the file on disk; see save_config
         self.roi_configs = self.config['video_input']['roi_configs']
         self.rois = {}  # Store ROI frames
-        self.movement_buffers = {f'roi_{i+1}': [] for i in range(4)}
+        self._roi_slices = {}  # Per-ROI (rows, cols, area) on the downscaled frame
+        self._roi_scratch = {}  # Per-ROI diff buffers for the non-numba path
+        self._roi_rects = []  # Per-ROI (name, top-left, bottom-right, label origin) for drawing
+        self.max_movement_values = 100  # Keep last 100 values per ROI
+        self.movement_buffers = {f'roi_{i+1}': deque(maxlen=self.max_movement_values) for i in range(4)}
         self.last_frame_time = 0
         self.last_vector_time = 0
         self.selected_cells = []
         self.cell_size = 40
         self.scale_factor = 1.0
         self.show_rois = True  # Toggle for ROI display
+        self._display_buf = None  # Reused canvas for show_frame overlays
+        self._select_bufs = None  # (grid, selection) canvases for select_roi
+        self._window_flags = None  # Display window flags, settled on first open_window
+        self._time_overlay = (0.0, 0.0)  # Cached (sin, cos) for the display
+        self._time_overlay_updated = float('-inf')
         self.calculating = False  # Initialize calculation state
+        self.current_movements = {}  # Latest per-ROI rates, shown by show_frame
         self.save_needed = False  # Flag for when saving is needed
+        self._buffers_dirty = False  # Movement buffers hold data from a calculation run
+        self._movement_seq = 0  # Bumped whenever movement_buffers change
+        self._scaled_cache = (-1, [])  # (_movement_seq, scaled latest 30 values)
         
         # Frame buffer for movement calculation
-        self.frame_buffer = []
         self.buffer_size = 3  # Keep 3 frames for rate of change calculation
+        self.frame_buffer = deque(maxlen=self.buffer_size)  # Oldest frame drops off on append
+        self._movement_pair = None  # (reference, current) prepared frames for the ROI counts
         self.movement_threshold = 5  # Threshold for movement detection
         
+        # Movement is measured on frames downscaled by this factor; the blur
+        # kernel shrinks with it so it covers the same area of the scene
+        self.movement_downscale = 2
+        blur_size = (21 // self.movement_downscale) | 1  # Kernel size must be odd
+        self.blur_ksize = (blur_size, blur_size)
+        self._rebuild_roi_slices()
+        self._rebuild_roi_rects()
+        
+        # Run the movement pipeline through OpenCV's T-API (OpenCL) when the
+        # build and device support it; otherwise stay on plain CPU arrays
+        self.use_opencl = cv2.ocl.haveOpenCL()
+        cv2.ocl.setUseOpenCL(self.use_opencl)
+        
         # Movement calculation timing
         self.frame_interval = 1.0  # Capture one frame per second
         self.vector_interval = 30.0  # Calculate movement vectors every 30 seconds
@@ -60,6 +223,11 @@ class VideoInput:
             
         # Save interval can be different from vector calculation interval
         self.save_interval = float(sampling_config.get('save_interval', self.vector_interval))
+        
+        # Optional running-average background (cv2.accumulateWeighted) to diff
+        # against instead of the oldest buffered frame; 0 keeps frame differencing
+        self.background_alpha = float(sampling_config.get('background_alpha', 0.0))
+        self._background = None  # float32 running average of prepared frames
         print(f"Movement calculation interval: {self.vector_interval} seconds")
         print(f"CSV save interval: {self.save_interval} seconds")
         
@@ -67,6 +235,15 @@ class VideoInput:
         self.last_vector_time = time.time()  # Last time vectors were calculated
         self.last_save_time = time.time()    # Last time data was saved to CSV
         
+        # Day's CSV file, kept open between saves and reopened when the date changes;
+        # only the writer thread touches it, fed through the row queue
+        self._csv_path = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._csv_queue = queue.Queue()
+        self._csv_thread = threading.Thread(target=self._csv_writer_loop, name="csv-writer", daemon=True)
+        self._csv_thread.start()
+        
         # Movement buffers
         self.vector_size = 30  # Store 30 values per ROI
 
@@ -84,22 +261,31 @@ class VideoInput:
         self.first_vector_sent = False
         self.last_vector_time = time.time()  # Track when we last sent a vector
         
+        # Resolve the destination once; send_to_controller reuses it on every send
+        self._dest_config = self.config['controllers'].get(self.destination)
+        self._uri = None
+        
         # Print initial connection info
-        dest_config = self.config['controllers'].get(self.destination)
+        dest_config = self._dest_config
         if dest_config:
+            self._uri = f"ws://{dest_config['ip']}:{dest_config.get('listen_port', 8765)}"
             print("\nInitial controller connection info:")
             print(f"Destination: {self.destination}")
             print(f"IP: {dest_config['ip']}")
             print(f"Port: {dest_config.get('listen_port', 8765)}")
-            print(f"URI: ws://{dest_config['ip']}:{dest_config.get('listen_port', 8765)}")
+            print(f"URI: {self._uri}")
         else:
             print(f"\nWarning: No configuration found for {self.destination}")
 
         # Network operation flag to avoid blocking main thread
         self.network_busy = False
         
+        # Persistent connection to the destination controller (opened on first send)
+        self._ws = None
+        self._ws_reader = None
+        
         # Create frame queue for threaded processing
-        self.frame_queue = queue.Queue(maxsize=10)  # Limit queue size to 10 frames
+        self.frame_queue = queue.Queue(maxsize=1)  # Single slot: the capture thread hands over one frame at a time
         self.processing_thread = None
         
         # Remove or set to False
@@ -109,16 +295,28 @@ class VideoInput:
     def load_config(self):
         """Load and initialize config with default ROI settings if needed"""
         config_path = Path(__file__).parent.parent.parent / 'config' / 'controllers.yaml'
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        cache_path = config_path.with_name(config_path.name + '.cache.json')
+        
+        # Reuse the JSON copy of the parsed YAML while the YAML file is unchanged
+        config_stat = config_path.stat()
+        config = _read_config_cache(cache_path, config_stat)
+        cache_stale = config is None
+        if cache_stale:
+            with open(config_path, 'r') as f:
+                config = yaml.load(f, Loader=YamlLoader)
+            
+        # Track whether any defaults were filled in
+        modified = False
             
         # Initialize video_input section if not present
         if 'video_input' not in config:
             config['video_input'] = {}
+            modified = True
             
         # Initialize ROI configs if not present
         if 'roi_configs' not in config['video_input']:
             config['video_input']['roi_configs'] = {}
+            modified = True
             
         # Ensure all ROIs have at least empty configs
         for i in range(1, 5):  # For ROIs 1-4
@@ -132,13 +330,59 @@ class VideoInput:
                     'description': f"ROI {i}",
                     'selected_cells': []
                 }
+                modified = True
                 
-        # Save initialized config
-        with open(config_path, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False)
+        # Save initialized config only if defaults were added
+        if modified:
+            with open(config_path, 'w') as f:
+                yaml.dump(config, f, Dumper=YamlDumper, default_flow_style=False)
+            config_stat = config_path.stat()
+            
+        if cache_stale or modified:
+            _write_config_cache(cache_path, config_stat, config)
             
         return config
 
+    def save_config(self):
+        """Write self.config to controllers.yaml if it changed; returns True when written"""
+        config_hash = hash(repr(self.config))
+        if config_hash == self._config_hash:
+            return False
+            
+        # Dump to a temp file and swap it in so a crash can't leave a truncated config
+        config_path = Path(__file__).parent.parent.parent / 'config' / 'controllers.yaml'
+        tmp_path = config_path.with_name(config_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            yaml.dump(self.config, f, Dumper=YamlDumper, default_flow_style=False)
+        os.replace(tmp_path, config_path)
+        
+        self._config_hash = config_hash
+        _write_config_cache(config_path.with_name(config_path.name + '.cache.json'),
+                            config_path.stat(), self.config)
+        return True
+
+    def _rebuild_roi_slices(self):
+        """Precompute ROI crops in downscaled frame coordinates"""
+        scale = self.movement_downscale
+        self._roi_slices = {}
+        for roi_name, roi_config in self.roi_configs.items():
+            x = int(roi_config['x']) // scale
+            y = int(roi_config['y']) // scale
+            x_end = (int(roi_config['x']) + int(roi_config['width'])) // scale
+            y_end = (int(roi_config['y']) + int(roi_config['height'])) // scale
+            area = max(1, (x_end - x) * (y_end - y))
+            self._roi_slices[roi_name] = (slice(y, y_end), slice(x, x_end), area)
+
+    def _rebuild_roi_rects(self):
+        """Precompute ROI rectangle corners for show_frame"""
+        self._roi_rects = []
+        for roi_name, roi_config in self.roi_configs.items():
+            x = int(roi_config['x'])
+            y = int(roi_config['y'])
+            w = int(roi_config['width'])
+            h = int(roi_config['height'])
+            self._roi_rects.append((roi_name, (x, y), (x+w, y+h), (x, y-5)))
+
     def get_stream_url(self, stream_name: str = 'venice_live') -> Optional[str]:
         """Get stream URL from config"""
         if not self.config or 'streams' not in self.config:
@@ -157,7 +401,7 @@ class VideoInput:
                 # Check if the input is a local file
                 if os.path.isfile(url):
                     print(f"Opening local video file: {url}")
-                    self.cap = cv2.VideoCapture(url)
+                    self.cap = self._open_capture(url)
                 else:
                     print(f"Attempting to connect to stream: {url}")
                     # Configure yt-dlp
@@ -172,14 +416,19 @@ class VideoInput:
                         stream_url = info['url']
                     
                     # Open video stream
-                    self.cap = cv2.VideoCapture(stream_url)
+                    self.cap = self._open_capture(stream_url)
                 
-                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 3)  # Reduce buffer size
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Keep only the newest frame in the backend
                 self.cap.set(cv2.CAP_PROP_FPS, 30)  # Request 30fps
                 
                 if not self.cap.isOpened():
                     raise Exception("Could not open video source")
                 
+                # A new source may have a different resolution; start the movement history over
+                self.frame_buffer.clear()
+                self._background = None
+                self._movement_pair = None
+                
                 self.is_running = True
                 self.last_frame_success = time.time()
                 
@@ -199,21 +448,50 @@ class VideoInput:
         print("All connection attempts failed")
         return False
     
+    def _open_capture(self, source):
+        """Open a source on the FFmpeg backend, hardware decoded if possible"""
+        # Builds without FFmpeg (or that reject the params) fall through to
+        # OpenCV's default backend selection, as before
+        attempts = [(cv2.CAP_FFMPEG,)]
+        if _CAPTURE_PARAMS is not None:
+            attempts.insert(0, (cv2.CAP_FFMPEG, _CAPTURE_PARAMS))
+        for args in attempts:
+            try:
+                cap = cv2.VideoCapture(source, *args)
+            except cv2.error:
+                continue
+            if cap.isOpened():
+                return cap
+            cap.release()
+        return cv2.VideoCapture(source)
+
     def start_frame_capture_thread(self):
         """Start a background thread to continuously capture frames"""
         def capture_frames():
+            # Stream reads block until the next frame arrives, so only local
+            # files (which decode as fast as the CPU allows) need throttling
+            local_file = os.path.isfile(getattr(self, 'current_source', ''))
+            
             while self.is_running:
                 if not self.cap or not self.cap.isOpened():
                     time.sleep(0.1)
                     continue
                 
-                success, frame = self.cap.read()
+                # grab() keeps the stream position current; the BGR conversion in
+                # retrieve() is only paid once the consumer has taken the last frame
+                success = self.cap.grab()
                 if success:
                     self.last_frame_success = time.time()
-                    # Only add to queue if there's space (to avoid memory issues)
-                    if not self.frame_queue.full():
-                        self.frame_queue.put(frame)
-                    time.sleep(0.01)  # Small sleep to avoid hogging CPU
+                    if self.frame_queue.empty():
+                        # retrieve() hands back a new array each call, so queued frames are never overwritten
+                        success, frame = self.cap.retrieve()
+                        if success:
+                            try:
+                                self.frame_queue.put_nowait(frame)
+                            except queue.Full:
+                                pass  # Another capture thread filled the slot first
+                    if local_file:
+                        time.sleep(0.01)  # Small sleep to avoid hogging CPU
                 else:
                     # Check if this is a local file
                     if hasattr(self, 'current_source') and os.path.isfile(self.current_source):
@@ -245,6 +523,7 @@ class VideoInput:
             try:
                 frame = self.frame_queue.get(timeout=0.1)
                 self.frame_count += 1
+                
                 self.last_frame = frame
                 return frame
             except queue.Empty:
@@ -266,60 +545,96 @@ class VideoInput:
         Encode time of day (hours, minutes, seconds) into sin/cos values
         Returns: (sin_value, cos_value) tuple
         """
-        # Get hours as float (0.0-23.999)
-        hours = timestamp.hour
-        minutes = timestamp.minute
-        seconds = timestamp.second
-        microseconds = timestamp.microsecond
-        
-        # Convert to fraction of day (0.0-1.0)
-        day_fraction = (hours + minutes/60 + seconds/3600 + microseconds/3600000000) / 24.0
+        # Seconds since midnight (0.0-86399.999999)
+        day_seconds = (timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
+                       + timestamp.microsecond * 1e-6)
         
         # Convert to radians (0 to 2π)
-        angle_rad = day_fraction * 2 * np.pi
+        angle_rad = day_seconds * _DAY_SECONDS_TO_RAD
         
-        # Calculate sin and cos values
-        sin_val = np.sin(angle_rad)
-        cos_val = np.cos(angle_rad)
+        # Scalar trig; math avoids numpy's per-call dispatch overhead
+        sin_val = math.sin(angle_rad)
+        cos_val = math.cos(angle_rad)
         
         return sin_val, cos_val
 
-    def calculate_movement_rate(self, roi_config):
-        """Calculate movement rate for an ROI"""
+    def prepare_movement_frame(self, frame):
+        """Downscale, grayscale and blur a frame once so every ROI can slice it"""
+        height, width = frame.shape[:2]
+        
+        # Run the full-frame passes through OpenCL when available and bring
+        # the small blurred result back once for the per-ROI counts
+        if self.use_opencl:
+            frame = cv2.UMat(frame)
+        
+        # Movement is a ratio of changed pixels, so it holds up at the lower resolution
+        small = cv2.resize(frame,
+                           (width // self.movement_downscale, height // self.movement_downscale),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        # A box filter is enough low-pass for thresholded differencing and,
+        # unlike a large Gaussian, costs the same per pixel at any kernel size
+        blurred = cv2.boxFilter(gray, -1, self.blur_ksize)
+        
+        return blurred.get() if self.use_opencl else blurred
+
+    def update_movement_pair(self, prepared):
+        """Record a prepared frame and pick the pair movement is measured between"""
+        if self.background_alpha > 0:
+            # Reseed on the first frame and whenever the resolution changes
+            if self._background is None or self._background.shape != prepared.shape:
+                self._background = prepared.astype(np.float32)
+                self._movement_pair = None
+                return
+            # Compare against the background as it was before this frame
+            reference = cv2.convertScaleAbs(self._background)
+            cv2.accumulateWeighted(prepared, self._background, self.background_alpha)
+            self._movement_pair = (reference, prepared)
+            return
+            
+        # A resolution change leaves older frames unmatched; start the history over
+        if self.frame_buffer and self.frame_buffer[-1].shape != prepared.shape:
+            self.frame_buffer.clear()
+        self.frame_buffer.append(prepared)
         if len(self.frame_buffer) < self.buffer_size:
+            self._movement_pair = None
+        else:
+            self._movement_pair = (self.frame_buffer[0], self.frame_buffer[-1])
+
+    def calculate_movement_rate(self, roi_name):
+        """Calculate movement rate for an ROI"""
+        if self._movement_pair is None:
             return 0.0
             
         try:
-            # Extract ROI from newest and oldest frames
-            oldest = self.frame_buffer[0]
-            newest = self.frame_buffer[-1]
-            
-            x = int(roi_config['x'])
-            y = int(roi_config['y'])
-            w = int(roi_config['width'])
-            h = int(roi_config['height'])
-            
-            oldest_roi = oldest[y:y+h, x:x+w]
-            newest_roi = newest[y:y+h, x:x+w]
-            
-            # Convert to grayscale and apply blur to reduce noise
-            oldest_gray = cv2.cvtColor(oldest_roi, cv2.COLOR_BGR2GRAY)
-            newest_gray = cv2.cvtColor(newest_roi, cv2.COLOR_BGR2GRAY)
-            
-            oldest_blur = cv2.GaussianBlur(oldest_gray, (21, 21), 0)
-            newest_blur = cv2.GaussianBlur(newest_gray, (21, 21), 0)
-            
-            # Calculate absolute difference between frames
-            frame_diff = cv2.absdiff(oldest_blur, newest_blur)
-            
-            # Apply threshold to highlight changes
-            _, thresh = cv2.threshold(frame_diff, self.movement_threshold, 255, cv2.THRESH_BINARY)
-            
-            # Count changed pixels (white pixels in threshold image)
-            movement_pixels = cv2.countNonZero(thresh)
+            # Slice the ROI out of the reference and newest prepared frames
+            rows, cols, roi_size = self._roi_slices[roi_name]
+            reference, current = self._movement_pair
+            oldest_blur = reference[rows, cols]
+            newest_blur = current[rows, cols]
+            
+            # The numba kernel doesn't bounds-check, so mismatched crops must not reach it
+            if oldest_blur.shape != newest_blur.shape:
+                raise ValueError(f"frame shapes differ: {oldest_blur.shape} vs {newest_blur.shape}")
+            
+            if _count_changed_pixels is not None:
+                # Fused diff + threshold + count in one pass, no intermediates
+                movement_pixels = _count_changed_pixels(oldest_blur, newest_blur, self.movement_threshold)
+            else:
+                # Calculate absolute difference between frames into a buffer kept
+                # per ROI, reallocated only when the ROI's shape changes
+                frame_diff = self._roi_scratch.get(roi_name)
+                if frame_diff is None or frame_diff.shape != oldest_blur.shape:
+                    frame_diff = np.empty_like(oldest_blur)
+                    self._roi_scratch[roi_name] = frame_diff
+                cv2.absdiff(oldest_blur, newest_blur, dst=frame_diff)
+                
+                # Threshold in place and let OpenCV count, so no boolean mask
+                # is built; THRESH_BINARY keeps the strict > comparison
+                cv2.threshold(frame_diff, self.movement_threshold, 255, cv2.THRESH_BINARY, dst=frame_diff)
+                movement_pixels = cv2.countNonZero(frame_diff)
             
             # Normalize by ROI size to get percentage of changed pixels
-            roi_size = w * h
             movement_rate = (movement_pixels / roi_size) * 100.0
             
             return movement_rate
@@ -343,25 +658,21 @@ class VideoInput:
             if frame is None:
                 return movements if return_movements else None
             
-            # Update frame buffer
-            self.frame_buffer.append(frame.copy())
-            if len(self.frame_buffer) > self.buffer_size:
-                self.frame_buffer.pop(0)
-            
             # Only calculate and save if we're in calculation mode
             if self.calculating:
+                self._buffers_dirty = True
+                
+                # Grayscale and blur each frame once here instead of per ROI
+                self.update_movement_pair(self.prepare_movement_frame(frame))
+                
                 # Calculate movement for each ROI if we have enough frames
-                if len(self.frame_buffer) == self.buffer_size:
-                    for roi_name, roi_config in self.roi_configs.items():
-                        movement = self.calculate_movement_rate(roi_config)
+                if self._movement_pair is not None:
+                    for roi_name in self.roi_configs:
+                        movement = self.calculate_movement_rate(roi_name)
+                        # Bounded deque; the oldest value drops off once full
                         self.movement_buffers[roi_name].append(movement)
                         movements[roi_name] = movement
-                        
-                        # Limit buffer size to prevent unbounded growth
-                        max_buffer_size = 100  # Keep last 100 values maximum
-                        if len(self.movement_buffers[roi_name]) > max_buffer_size:
-                            # Remove oldest values, keeping the most recent
-                            self.movement_buffers[roi_name] = self.movement_buffers[roi_name][-max_buffer_size:]
+                    self._movement_seq += 1
                 
                 # Check if it's time to calculate vectors (every vector_interval seconds)
                 if current_time - self.last_vector_time >= self.vector_interval:
@@ -374,11 +685,15 @@ class VideoInput:
                     self.save_needed = True
                     self.last_save_time = current_time
             else:
-                # Clear movement buffers when stopping calculation
-                if hasattr(self, 'movement_buffers'):
-                    for roi_name in self.movement_buffers:
-                        self.movement_buffers[roi_name] = []
-                self.frame_buffer = []  # Clear frame buffer too
+                # Clear movement buffers once when calculation stops
+                if self._buffers_dirty:
+                    for buffer in self.movement_buffers.values():
+                        buffer.clear()
+                    self._movement_seq += 1
+                    self._buffers_dirty = False
+                self.frame_buffer.clear()  # Clear frame buffer too
+                self._background = None
+                self._movement_pair = None
             
             self.last_frame_time = current_time
             self.current_movements = movements  # Store for display
@@ -391,7 +706,7 @@ class VideoInput:
             
         return movements if return_movements else None
 
-    def get_csv_path(self):
+    def get_csv_path(self, venice_time=None):
         """Get CSV path with date-based rotation"""
         # Get base directory (supports both development and deployed environments)
         if os.path.exists('/home/input-column/venice/data'):
@@ -406,7 +721,8 @@ class VideoInput:
         base_dir.mkdir(parents=True, exist_ok=True)
         
         # Get current Venice time and format date string
-        venice_time = self.get_venice_time()
+        if venice_time is None:
+            venice_time = self.get_venice_time()
         date_str = venice_time.strftime('%Y%m%d')
         
         # Return full path with date
@@ -430,50 +746,61 @@ class VideoInput:
         """Save movement vector to CSV only, without sending to controller"""
         if len(self.movement_buffers['roi_1']) >= 30:
             # Scale values for CSV - use the latest 30 values
-            scaled_values = []
-            # If we have more than 30 values, get the latest 30
-            buffer_values = self.movement_buffers['roi_1'][-30:]
-            
-            for i in range(30):
-                raw_movement = buffer_values[i]
-                scaled = self.scale_movement_log(raw_movement, 20, 127)  # Update range to 20-127
-                scaled_values.append(scaled)
+            scaled_values = self.latest_scaled_values()
             
             # Get current time in Venice
             venice_time = self.get_venice_time()
             t_sin, t_cos = self.encode_time(venice_time)
             
-            # Get CSV file path and ensure parent directory exists
-            csv_path = self.get_csv_path()
-            csv_path.parent.mkdir(parents=True, exist_ok=True)
-            print(f"\n[CSV] Saving data to file: {csv_path}")
-            
-            # Create a thread for CSV writing to avoid blocking
-            def write_csv():
-                try:
-                    # Create CSV if it doesn't exist, append if it does
-                    file_exists = csv_path.exists()
-                    with open(csv_path, mode='a', newline='') as f:
-                        writer = csv.writer(f)
-                        if not file_exists:
-                            # Write header if new file
-                            writer.writerow(['timestamp', 't_sin', 't_cos'] + [f'movement_{i}' for i in range(30)])
-                        
-                        # Write data row
-                        writer.writerow([str(venice_time), t_sin, t_cos] + scaled_values)
-                    print(f"[CSV] Successfully wrote data to {csv_path}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to write to CSV: {e}")
-            
-            # Create and start CSV write thread
-            csv_thread = threading.Thread(target=write_csv)
-            csv_thread.daemon = True
-            csv_thread.start()
+            # Hand the row to the writer thread to avoid blocking; it also
+            # resolves the dated path, since that touches the filesystem
+            print(f"\n[CSV] Queued movement vector for {venice_time:%Y-%m-%d %H:%M:%S}")
+            self._csv_queue.put((venice_time, [str(venice_time), t_sin, t_cos] + scaled_values))
             return True
         else:
             print(f"[WARNING] Not enough values to save to CSV: {len(self.movement_buffers['roi_1'])}/30")
             return False
     
+    def _csv_writer_loop(self):
+        """Write queued CSV rows in order; a None item stops the loop"""
+        while True:
+            item = self._csv_queue.get()
+            if item is None:
+                break
+            venice_time, row = item
+            try:
+                csv_path = self.get_csv_path(venice_time)
+                self._write_csv_row(csv_path, row)
+                print(f"[CSV] Successfully wrote data to {csv_path}")
+            except Exception as e:
+                print(f"[ERROR] Failed to write to CSV: {e}")
+                self._close_csv()  # Reopen on the next row
+        self._close_csv()
+    
+    def _write_csv_row(self, csv_path, row):
+        """Append a row to the day's CSV, reusing the open file between saves"""
+        # Date rotation gives a new path; switch files only then
+        if csv_path != self._csv_path:
+            self._close_csv()
+            file_exists = csv_path.exists()
+            self._csv_file = open(csv_path, mode='a', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_path = csv_path
+            if not file_exists:
+                # Write header if new file
+                self._csv_writer.writerow(['timestamp', 't_sin', 't_cos'] + [f'movement_{i}' for i in range(30)])
+        
+        self._csv_writer.writerow(row)
+        self._csv_file.flush()
+    
+    def _close_csv(self):
+        """Close the open CSV file, if any"""
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_path = None
+        self._csv_file = None
+        self._csv_writer = None
+    
     async def wait_for_ack_task(self):
         """Non-blocking task to wait for acknowledgment with timeout"""
         try:
@@ -485,33 +812,24 @@ class VideoInput:
             
             print(f"[ACK] Waiting for acknowledgment (timeout: {self.ack_timeout}s)")
             
-            # Create a timeout task that will automatically clear the wait after timeout
-            async def timeout_task():
-                try:
-                    # Wait for the specified timeout period
-                    await asyncio.sleep(self.ack_timeout)
-                    
-                    # If we're still waiting, cancel the wait
-                    if self.waiting_for_ack:
-                        print(f"\n[WARNING] Acknowledgment timeout after {self.ack_timeout} seconds")
-                        self.waiting_for_ack = False
-                except asyncio.CancelledError:
-                    # Task was cancelled, which means ack was received
-                    pass
-                except Exception as e:
-                    print(f"[ERROR] Error in timeout task: {e}")
-            
-            # Start the timeout task in the background
-            self.ack_task = asyncio.create_task(timeout_task())
-            
-            # Return immediately - don't block execution
-            # The timeout task will handle clearing the wait flag after timeout
+            # Wait in the background - don't block execution; the ACK handler
+            # sets the event, otherwise the timeout clears the wait flag
+            self.ack_task = asyncio.create_task(self._await_ack())
             return True
             
         except Exception as e:
             print(f"[ERROR] Error in acknowledgment wait task: {e}")
             self.waiting_for_ack = False
             return False
+    
+    async def _await_ack(self):
+        """Wait for the ACK event, clearing the wait flag if it times out"""
+        try:
+            await asyncio.wait_for(self.ack_received.wait(), timeout=self.ack_timeout)
+        except asyncio.TimeoutError:
+            if self.waiting_for_ack:
+                print(f"\n[WARNING] Acknowledgment timeout after {self.ack_timeout} seconds")
+                self.waiting_for_ack = False
             
     async def cancel_ack_wait(self):
         """Cancel the current acknowledgment wait task if it exists"""
@@ -541,14 +859,7 @@ class VideoInput:
             
             try:
                 # Scale values for transmission - always use the latest 30 values
-                scaled_values = []
-                buffer_values = self.movement_buffers['roi_1'][-30:]
-                
-                for i in range(30):
-                    raw_movement = buffer_values[i]
-                    # Use updated scaling to ensure values are in 20-127 range
-                    scaled = self.scale_movement_log(raw_movement, 20, 127)
-                    scaled_values.append(scaled)
+                scaled_values = self.latest_scaled_values()
                 
                 # Get current time in Venice
                 venice_time = self.get_venice_time()
@@ -584,50 +895,92 @@ class VideoInput:
             print(f"[WARNING] Not enough values to send: {len(self.movement_buffers['roi_1'])}/30")
             return False
     
+    async def _ensure_ws(self):
+        """Return the open controller connection, connecting first if needed"""
+        if self._ws is not None and self._ws.state is State.OPEN:
+            return self._ws
+            
+        logger.info("Connecting to %s at %s", self.destination, self._uri)
+        self._ws = await websockets.connect(
+            self._uri,
+            # Library-default permessage-deflate; on a persistent connection the
+            # compression context carries over between packets, so the repeated
+            # JSON keys shrink after the first send
+            compression="deflate",
+            ping_interval=20,  # Keepalive so a dead controller is noticed between sends
+            ping_timeout=20,
+            close_timeout=1.0  # Quick closure
+        )
+        logger.info("Connected to %s", self.destination)
+        
+        # The controller answers every message; keep reading so replies don't pile up
+        self._ws_reader = asyncio.create_task(self._drain_controller_replies(self._ws))
+        return self._ws
+    
+    async def _drain_controller_replies(self, websocket):
+        """Consume controller replies until the connection closes"""
+        try:
+            async for _ in websocket:
+                pass
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if self._ws is websocket:
+                self._ws = None
+    
+    async def _drop_controller_connection(self):
+        """Close the controller connection so the next send reconnects"""
+        websocket, self._ws = self._ws, None
+        if websocket is not None:
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+    
     async def send_to_controller(self, data):
-        """Send data to controller with improved error handling"""
+        """Send data to controller over a persistent connection"""
         try:
-            # Get controller config
-            dest_config = self.config['controllers'].get(self.destination)
-            if not dest_config:
-                print(f"\n[ERROR] No configuration found for destination: {self.destination}")
+            if self._uri is None:
+                logger.error("No configuration found for destination: %s", self.destination)
                 return False
-
-            # Connect to controller with a shorter timeout
-            uri = f"ws://{dest_config['ip']}:{dest_config.get('listen_port', 8765)}"
-            print(f"\n[STATUS] Connecting to {self.destination}:")
-            print(f"URI: {uri}")
+            
+            # Serialize once up front; receivers json.loads a text frame
+            payload = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY).decode()
             
             # Use a timeout to prevent hanging connection - shorter timeout
             try:
                 async with asyncio.timeout(3):  # 3 seconds timeout instead of 5
-                    async with websockets.connect(
-                        uri,
-                        ping_interval=None,  # Disable ping to reduce traffic
-                        ping_timeout=None,
-                        close_timeout=1.0  # Quick closure
-                    ) as websocket:
-                        print(f"[SUCCESS] Connected to {self.destination}")
-                        await websocket.send(json.dumps(data))
-                        print(f"[SUCCESS] Data sent to {self.destination}")
-                        if len(data.get('data', {}).get('pot_values', [])) > 0:
-                            timestamp = data.get('timestamp', 'unknown')
-                            pot_count = len(data.get('data', {}).get('pot_values', []))
-                            print(f"[DATA] Timestamp: {timestamp}")
-                            print(f"[DATA] Sent {pot_count} movement values")
-                        return True
+                    try:
+                        websocket = await self._ensure_ws()
+                        await websocket.send(payload)
+                    except websockets.exceptions.ConnectionClosed:
+                        # Controller went away since the last send; reconnect once
+                        logger.warning("Connection to %s was closed, reconnecting", self.destination)
+                        self._ws = None
+                        websocket = await self._ensure_ws()
+                        await websocket.send(payload)
+                        
+                # Per-send chatter is debug only; formatting happens in the log thread
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Sent %d movement values to %s (timestamp %s)",
+                                 len(data.get('data', {}).get('pot_values', [])),
+                                 self.destination, data.get('timestamp', 'unknown'))
+                return True
             except asyncio.TimeoutError:
-                print(f"\n[ERROR] Connection to {self.destination} timed out")
+                logger.error("Connection to %s timed out", self.destination)
+                await self._drop_controller_connection()
                 return False
                     
         except websockets.exceptions.InvalidStatusCode as e:
-            print(f"\n[ERROR] Invalid status from {self.destination}: {e}")
+            logger.error("Invalid status from %s: %s", self.destination, e)
             return False
         except websockets.exceptions.ConnectionClosed as e:
-            print(f"\n[ERROR] Connection to {self.destination} closed unexpectedly: {e}")
+            logger.error("Connection to %s closed unexpectedly: %s", self.destination, e)
+            self._ws = None
             return False
         except Exception as e:
-            print(f"\n[ERROR] Failed to send to controller: {e}")
+            logger.error("Failed to send to controller: %s", e)
+            await self._drop_controller_connection()
             return False
 
     def reconnect(self):
@@ -664,6 +1017,17 @@ class VideoInput:
         else:
             print("[ERROR] No stream URL found for reconnection")
 
+    def latest_scaled_values(self):
+        """Scaled latest 30 roi_1 values, reused until the buffers change"""
+        # A CSV save and a controller send in the same tick see the same window,
+        # so only the first of them pays for the scaling
+        if self._scaled_cache[0] != self._movement_seq:
+            # islice skips the older values without copying the whole deque first
+            buffer = self.movement_buffers['roi_1']
+            buffer_values = list(islice(buffer, max(0, len(buffer) - 30), None))
+            self._scaled_cache = (self._movement_seq, self.scale_movement_log_vec(buffer_values))
+        return self._scaled_cache[1]
+
     def scale_movement_log(self, raw_movement, min_value, max_value):
         """Scale movement value using logarithmic scaling (to emphasize smaller movements)"""
         # Apply a logarithmic scaling to emphasize smaller movements
@@ -677,8 +1041,18 @@ class VideoInput:
         # Empirically, log(0.1) ≈ -2.3 and maximum log for large movement could be around 4.6
         scaled = 20 + (log_value + 2.3) * ((127 - 20) / 7)
         
-        # Clamp to range 20-127
-        return max(20, min(127, scaled))
+        # Clamp to range 20-127; pot steps are whole numbers
+        return int(round(max(20, min(127, scaled))))
+
+    def scale_movement_log_vec(self, values):
+        """Apply scale_movement_log to a window of values at once; returns whole pot steps"""
+        raw = np.asarray(values, dtype=np.float64)
+        log_values = np.log(np.maximum(raw, 0.0) + 0.1)
+        scaled = np.clip(20 + (log_values + 2.3) * ((127 - 20) / 7), 20, 127)
+        
+        # Non-positive movement maps to the minimum, as in the scalar version
+        scaled[raw <= 0] = 20
+        return np.rint(scaled).astype(int).tolist()
 
     def close(self):
         """Clean up resources"""
@@ -693,56 +1067,77 @@ class VideoInput:
             print("[INFO] Waiting for processing thread to complete...")
             time.sleep(1)  # Give thread a chance to exit
         
+        # The CSV writer keeps running: the runner reuses this instance via
+        # connect_to_stream after close(); aclose() stops it at final shutdown
         print("[INFO] Video input closed")
 
+    async def aclose(self):
+        """Close network connections and the CSV writer; call from the event loop at shutdown"""
+        if self._ws is not None:
+            print(f"[INFO] Closing connection to {self.destination}")
+        await self._drop_controller_connection()
+        
+        # Let the CSV writer finish queued rows and close the file
+        if self._csv_thread.is_alive():
+            self._csv_queue.put(None)
+            await asyncio.to_thread(self._csv_thread.join, 2)
+
+    def open_window(self, window_name="Venice Stream"):
+        """Create a resizable display window, GPU-scaled when OpenCV has OpenGL support"""
+        if self._window_flags is None:
+            try:
+                cv2.namedWindow(window_name, cv2.WINDOW_NORMAL | cv2.WINDOW_OPENGL)
+                self._window_flags = cv2.WINDOW_NORMAL | cv2.WINDOW_OPENGL
+                return
+            except cv2.error:
+                # Built without OpenGL; fall back to a plain resizable window
+                self._window_flags = cv2.WINDOW_NORMAL
+        cv2.namedWindow(window_name, self._window_flags)
+
     def show_frame(self, frame, window_name="Venice Stream"):
         """Show frame with ROI overlay and movement values"""
         if frame is not None:
-            display_frame = frame.copy()
+            # Draw on a reused buffer; the frame itself is still needed for processing
+            if self._display_buf is None or self._display_buf.shape != frame.shape:
+                self._display_buf = np.empty_like(frame)
+            np.copyto(self._display_buf, frame)
+            display_frame = self._display_buf
             
-            # Add Venice timestamp and frame number
-            venice_time = self.get_venice_time().strftime('%H:%M:%S')
-            cv2.putText(display_frame, f"Frame: {self.frame_count}", 
-                      (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            # Add frame number
+            cv2.putText(display_frame, f"Frame: {self.frame_count}",
+                        (10, 30), _FONT, 0.7, _WHITE, 2)
             
             # Draw ROIs if enabled
             if self.show_rois and self.roi_configs:
-                for roi_name, roi_config in self.roi_configs.items():
-                    x = int(roi_config['x'])
-                    y = int(roi_config['y'])
-                    w = int(roi_config['width'])
-                    h = int(roi_config['height'])
-                    cv2.rectangle(display_frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+                for roi_name, top_left, bottom_right, label_origin in self._roi_rects:
+                    cv2.rectangle(display_frame, top_left, bottom_right, _GREEN, 2)
                     
                     # Add ROI label and movement value if calculating
-                    if hasattr(self, 'current_movements') and self.calculating:
+                    if self.calculating and self.current_movements:
                         movement_val = self.current_movements.get(roi_name, 0)
-                        cv2.putText(display_frame, 
-                                  f"{roi_name}: {movement_val:.2f}", 
-                                  (x, y-5), cv2.FONT_HERSHEY_SIMPLEX, 
-                                  0.6, (0, 255, 0), 2)
+                        cv2.putText(display_frame, f"{roi_name}: {movement_val:.2f}",
+                                    label_origin, _FONT, 0.6, _GREEN, 2)
             
             # Draw recording indicator and time encoding when calculating
             if self.calculating:
-                # Get current time encoding
-                t_sin, t_cos = self.encode_time(self.get_venice_time())
+                # Time encoding only moves visibly every few seconds; refresh it
+                # twice a second instead of converting timezones per frame
+                now = time.monotonic()
+                if now - self._time_overlay_updated >= 0.5:
+                    self._time_overlay = self.encode_time(self.get_venice_time())
+                    self._time_overlay_updated = now
+                t_sin, t_cos = self._time_overlay
                 
                 # Draw recording dot
                 radius = 10
                 center = (display_frame.shape[1]-20, 20)
-                cv2.circle(display_frame, center, radius, (0, 0, 255), -1)
+                cv2.circle(display_frame, center, radius, _RED, -1)
                 
                 # Add time encoding values
-                cv2.putText(display_frame,
-                          f"sin(t): {t_sin:.2f}",
-                          (display_frame.shape[1]-150, 15),
-                          cv2.FONT_HERSHEY_SIMPLEX,
-                          0.5, (255, 255, 255), 1)
-                cv2.putText(display_frame,
-                          f"cos(t): {t_cos:.2f}",
-                          (display_frame.shape[1]-150, 35),
-                          cv2.FONT_HERSHEY_SIMPLEX,
-                          0.5, (255, 255, 255), 1)
+                cv2.putText(display_frame, f"sin(t): {t_sin:.2f}",
+                            (display_frame.shape[1]-150, 15), _FONT, 0.5, _WHITE, 1)
+                cv2.putText(display_frame, f"cos(t): {t_cos:.2f}",
+                            (display_frame.shape[1]-150, 35), _FONT, 0.5, _WHITE, 1)
                 
             cv2.imshow(window_name, display_frame)
         return True
@@ -753,11 +1148,9 @@ class VideoInput:
             return False
             
         # Calculate ROI bounds from selected cells
-        cell_coords = np.array(selected_cells) * self.cell_size
-        min_x = np.min(cell_coords[:, 0])
-        min_y = np.min(cell_coords[:, 1])
-        max_x = np.max(cell_coords[:, 0]) + self.cell_size
-        max_y = np.max(cell_coords[:, 1]) + self.cell_size
+        cells = np.asarray(selected_cells, dtype=np.int32)
+        min_x, min_y = cells.min(axis=0) * self.cell_size
+        max_x, max_y = (cells.max(axis=0) + 1) * self.cell_size
         
         # Update config
         roi_name = f'roi_{roi_number}'
@@ -771,13 +1164,13 @@ class VideoInput:
         }
         
         # Save to config file
-        config_path = Path(__file__).parent.parent.parent / 'config' / 'controllers.yaml'
-        print(f"Saving ROI {roi_number} to {config_path}")
-        with open(config_path, 'w') as f:
-            yaml.dump(self.config, f, default_flow_style=False)
+        print(f"Saving ROI {roi_number} to config")
+        self.save_config()
             
         # Update roi_configs reference
         self.roi_configs = self.config['video_input']['roi_configs']
+        self._rebuild_roi_slices()
+        self._rebuild_roi_rects()
         return True
 
     def select_single_roi(self, frame):
@@ -788,9 +1181,8 @@ class VideoInput:
                 return False
             if 1 <= roi_num <= 4:
                 print("\nClick cells to select, press ENTER when done, ESC to cancel")
-                # Make sure we're using a copy of the frame
-                frame_copy = frame.copy()
-                selected_cells = self.select_roi(frame_copy)
+                # select_roi draws on its own buffers and leaves frame untouched
+                selected_cells = self.select_roi(frame)
                 if selected_cells:
                     print(f"Saving ROI {roi_num} configuration...")
                     self.save_roi_to_config(roi_num, selected_cells)
@@ -824,8 +1216,11 @@ class VideoInput:
 
     def select_roi(self, frame):
         """Select ROI using grid interface"""
-        # Create a copy of the frame for drawing
-        display = frame.copy()
+        # Draw on canvases reused across selection sessions; frame stays untouched
+        if self._select_bufs is None or self._select_bufs[0].shape != frame.shape:
+            self._select_bufs = (np.empty_like(frame), np.empty_like(frame))
+        display, display_updated = self._select_bufs
+        np.copyto(display, frame)
         height, width = frame.shape[:2]
         
         # Calculate grid
@@ -833,51 +1228,48 @@ class VideoInput:
         cols = width // self.cell_size
         
         # Draw initial grid with thinner, darker lines
-        grid_color = (50, 50, 50)  # Darker gray
+        grid_color = _DARK_GRAY
         grid_thickness = 1  # Thinner lines
         
-        # Draw grid
-        for i in range(rows + 1):
-            cv2.line(display, (0, i * self.cell_size), 
-                    (width, i * self.cell_size), grid_color, grid_thickness)
-        for j in range(cols + 1):
-            cv2.line(display, (j * self.cell_size, 0), 
-                    (j * self.cell_size, height), grid_color, grid_thickness)
+        # Draw grid as one batch of two-point segments instead of a call per line
+        ys = np.arange(rows + 1, dtype=np.int32) * self.cell_size
+        xs = np.arange(cols + 1, dtype=np.int32) * self.cell_size
+        horizontal = np.stack([np.stack([np.zeros_like(ys), ys], axis=1),
+                               np.stack([np.full_like(ys, width), ys], axis=1)], axis=1)
+        vertical = np.stack([np.stack([xs, np.zeros_like(xs)], axis=1),
+                             np.stack([xs, np.full_like(xs, height)], axis=1)], axis=1)
+        grid_lines = np.concatenate([horizontal, vertical])
+        cv2.polylines(display, list(grid_lines), False, grid_color, grid_thickness)
         
         self.selected_cells = []  # Reset selected cells
+        # Insertion-ordered set of (x, y) cells for O(1) click toggles
+        selected = {}
+        
+        # Corner offsets of one grid cell, added to each selected cell's origin
+        cell_offsets = np.array([[0, 0], [self.cell_size, 0],
+                                 [self.cell_size, self.cell_size], [0, self.cell_size]], dtype=np.int32)
         
         def mouse_callback(event, x, y, flags, param):
             if event == cv2.EVENT_LBUTTONDOWN:
                 # Convert click to grid coordinates
                 cell_x = x // self.cell_size
                 cell_y = y // self.cell_size
-                cell = [cell_x, cell_y]
+                cell = (cell_x, cell_y)
                 
                 # Toggle cell selection
-                if cell in self.selected_cells:
-                    self.selected_cells.remove(cell)
+                if cell in selected:
+                    del selected[cell]
                 else:
-                    self.selected_cells.append(cell)
-                
-                # Redraw grid and selections
-                display_updated = frame.copy()
+                    selected[cell] = None
                 
-                # Draw grid with same style
-                for i in range(rows + 1):
-                    cv2.line(display_updated, (0, i * self.cell_size), 
-                            (width, i * self.cell_size), grid_color, grid_thickness)
-                for j in range(cols + 1):
-                    cv2.line(display_updated, (j * self.cell_size, 0), 
-                            (j * self.cell_size, height), grid_color, grid_thickness)
+                # Restore the gridded frame, then redraw selections
+                np.copyto(display_updated, display)
                 
-                # Draw selected cells
-                for cell_x, cell_y in self.selected_cells:
-                    x1 = cell_x * self.cell_size
-                    y1 = cell_y * self.cell_size
-                    cv2.rectangle(display_updated, 
-                                (x1, y1), 
-                                (x1 + self.cell_size, y1 + self.cell_size), 
-                                (0, 255, 0), 2)
+                # Draw selected cells as one batch of closed outlines
+                if selected:
+                    corners = np.array(list(selected), dtype=np.int32) * self.cell_size
+                    outlines = corners[:, None, :] + cell_offsets
+                    cv2.polylines(display_updated, list(outlines), True, _GREEN, 2)
                 
                 cv2.imshow("Select ROI", display_updated)
         
@@ -887,9 +1279,14 @@ class VideoInput:
         cv2.imshow("Select ROI", display)
         
         while True:
-            key = cv2.waitKey(1) & 0xFF
+            # Wait up to 30 ms per poll so the selection loop doesn't spin a core
+            key = cv2.waitKey(30) & 0xFF
+            if key == 0xFF:  # No key pressed
+                continue
             if key == 13:  # Enter key
                 cv2.destroyWindow("Select ROI")
+                # Config stores cells as [x, y] lists (YAML safe_dump can't write tuples)
+                self.selected_cells = [list(cell) for cell in selected]
                 return self.selected_cells
             elif key == 27:  # Escape key
                 cv2.destroyWindow("Select ROI")
@@ -908,6 +1305,14 @@ class VideoInputWithAck(VideoInput):
         # Async tasks
         self.ack_task = None
         self.ack_received = asyncio.Event()
+        
+        # The ACK server runs on its own thread and loop so send-path work can't delay ACKs
+        self._ack_loop = None
+        self._ack_thread = None
+        self._main_loop = None
+        
+        # In-flight ack_receipt sends; held so the tasks aren't garbage collected
+        self._ack_reply_tasks = set()
         self.ack_timeout = 30  # Reduced timeout for acknowledgments in seconds
         
         # Print ACK info
@@ -920,7 +1325,29 @@ class VideoInputWithAck(VideoInput):
             print(f"\nWarning: No configuration found for ACK source: {self.ack_destination}")
     
     async def setup_ack_server(self, force_restart=False):
-        """Setup websocket server to listen for acknowledgments"""
+        """Setup websocket server to listen for acknowledgments on the ACK thread"""
+        self._main_loop = asyncio.get_running_loop()
+        if self._ack_loop is None:
+            self._ack_loop = asyncio.new_event_loop()
+            self._ack_thread = threading.Thread(target=self._ack_loop.run_forever,
+                                                name="ack-server", daemon=True)
+            self._ack_thread.start()
+        
+        future = asyncio.run_coroutine_threadsafe(self._start_ack_server(force_restart), self._ack_loop)
+        return await asyncio.wrap_future(future)
+    
+    async def _serve(self, handler, port):
+        """Start the acknowledgment websocket server on the given port"""
+        return await websockets.serve(handler, "0.0.0.0", port, **_ACK_SERVE_KWARGS)
+    
+    def _ack_arrived(self):
+        """Mark the pending send as acknowledged; runs on the sender's loop"""
+        # Important: Set this BEFORE setting the event; the pending wait then finishes on its own
+        self.waiting_for_ack = False
+        self.ack_received.set()
+    
+    async def _start_ack_server(self, force_restart=False):
+        """Create the acknowledgment server; runs on the ACK loop"""
         try:
             # Handle force restart
             if force_restart and self.server:
@@ -940,20 +1367,6 @@ class VideoInputWithAck(VideoInput):
                     print("[ACK] Existing server appears invalid, creating new server")
                     self.server = None
             
-            # Check if the port is already in use by another process
-            try:
-                import socket
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex(('127.0.0.1', self.listen_port))
-                sock.close()
-                
-                if result == 0:
-                    print(f"[WARNING] Port {self.listen_port} is already in use by another process")
-                    print("[ACK] Attempting to use existing port binding...")
-            except Exception as e:
-                print(f"[WARNING] Error checking port availability: {e}")
-            
             # Now try to create the server
             print(f"\n[ACK] Setting up acknowledgment server on port {self.listen_port}")
                 
@@ -964,51 +1377,45 @@ class VideoInputWithAck(VideoInput):
                     print(f"[ACK] New connection established from {client_ip}")
                     async for message in websocket:
                         try:
-                            data = json.loads(message)
+                            data = orjson.loads(message)
                             print(f"\n[ACK] Received message: {data}")
                             
                             # Check if it's an acknowledgment
                             if data.get('type') == 'ack':
                                 print(f"[ACK] Acknowledgment received from {client_ip}!")
-                                # Important: Set this BEFORE setting the event
-                                self.waiting_for_ack = False
+                                # The wait state lives on the sender's loop; asyncio objects aren't thread-safe
+                                self._main_loop.call_soon_threadsafe(self._ack_arrived)
                                 
-                                # Clear any timeouts and set the event
-                                if self.ack_task and not self.ack_task.done():
-                                    self.ack_task.cancel()
-                                    
-                                self.ack_received.set()
-                                
-                                # Respond with confirmation (optional but helps debugging)
-                                try:
-                                    response = {
-                                        'type': 'ack_receipt',
-                                        'status': 'success',
-                                        'message': 'Acknowledgment received successfully'
-                                    }
-                                    await websocket.send(json.dumps(response))
-                                except:
-                                    pass
+                                # Respond with confirmation (optional but helps debugging); sent in
+                                # the background so the handler goes straight back to reading
+                                reply = asyncio.create_task(_send_quietly(websocket, _ACK_RECEIPT))
+                                self._ack_reply_tasks.add(reply)
+                                reply.add_done_callback(self._ack_reply_tasks.discard)
                             else:
                                 print(f"[INFO] Received non-ACK message: {data.get('type', 'unknown')}")
                                 
-                        except json.JSONDecodeError:
+                        except orjson.JSONDecodeError:
                             print(f"[WARNING] Received invalid JSON: {message}")
                 except websockets.exceptions.ConnectionClosed:
                     print(f"[INFO] ACK connection from {client_ip} closed gracefully")
                 except Exception as e:
                     print(f"[ERROR] Websocket handler error: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    if logger.isEnabledFor(logging.DEBUG):
+                        traceback.print_exc()
             
             # Create the server with more lenient settings
             print(f"[ACK] Starting server on 0.0.0.0:{self.listen_port}")
             
             try:
-                # Get the websockets version to determine the correct function signature
-                import websockets
-                ws_version = websockets.__version__.split('.')
-                major_version = int(ws_version[0]) if ws_version else 0
+                # Older websockets versions pass a path argument to the handler
+                if _WS_MAJOR >= 10:
+                    print(f"[INFO] Using websockets {websockets.__version__} (new API)")
+                    serve_handler = handler
+                else:
+                    print(f"[INFO] Using websockets {websockets.__version__} (legacy API)")
+                    
+                    async def serve_handler(websocket, path):
+                        await handler(websocket)
                 
                 # Try with increased retry count and exception handling
                 max_retries = 3
@@ -1022,41 +1429,7 @@ class VideoInputWithAck(VideoInput):
                             print(f"[ACK] Retry attempt {attempt}/{max_retries} after {retry_delay} seconds")
                             await asyncio.sleep(retry_delay)
                             
-                        # Handle both older (path parameter required) and newer versions
-                        if major_version >= 10:
-                            # Newer websockets version (10.0+) - no path parameter
-                            print(f"[INFO] Using websockets {websockets.__version__} (new API)")
-                            # Try with SO_REUSEADDR option
-                            self.server = await websockets.serve(
-                                handler, 
-                                "0.0.0.0",
-                                self.listen_port,
-                                ping_interval=None,
-                                ping_timeout=None,
-                                close_timeout=10,
-                                max_size=10485760,
-                                max_queue=32,
-                                reuse_address=True  # Allow reuse of address
-                            )
-                        else:
-                            # Older websockets version - path parameter required
-                            print(f"[INFO] Using websockets {websockets.__version__} (legacy API)")
-                            
-                            # Create a wrapper handler that accepts the path parameter
-                            async def legacy_handler(websocket, path):
-                                await handler(websocket)
-                                
-                            self.server = await websockets.serve(
-                                legacy_handler, 
-                                "0.0.0.0",
-                                self.listen_port,
-                                ping_interval=None,
-                                ping_timeout=None,
-                                close_timeout=10,
-                                max_size=10485760,
-                                max_queue=32,
-                                reuse_address=True  # Allow reuse of address
-                            )
+                        self.server = await self._serve(serve_handler, self.listen_port)
                         
                         # If we get here, server creation was successful
                         break
@@ -1067,28 +1440,7 @@ class VideoInputWithAck(VideoInput):
                             alt_port = self.listen_port + attempt + 1
                             print(f"[ACK] Trying alternate port {alt_port}")
                             try:
-                                if major_version >= 10:
-                                    self.server = await websockets.serve(
-                                        handler, 
-                                        "0.0.0.0",
-                                        alt_port,
-                                        ping_interval=None,
-                                        ping_timeout=None,
-                                        close_timeout=10,
-                                        max_size=10485760,
-                                        max_queue=32
-                                    )
-                                else:
-                                    self.server = await websockets.serve(
-                                        legacy_handler, 
-                                        "0.0.0.0",
-                                        alt_port,
-                                        ping_interval=None,
-                                        ping_timeout=None,
-                                        close_timeout=10,
-                                        max_size=10485760,
-                                        max_queue=32
-                                    )
+                                self.server = await self._serve(serve_handler, alt_port)
                                 # Update the port if successful
                                 self.listen_port = alt_port
                                 print(f"[ACK] Successfully bound to alternate port {alt_port}")
@@ -1120,8 +1472,8 @@ class VideoInputWithAck(VideoInput):
                     return None
             except Exception as e:
                 print(f"[ERROR] Failed to create server: {e}")
-                import traceback
-                traceback.print_exc()
+                if logger.isEnabledFor(logging.DEBUG):
+                    traceback.print_exc()
                 return None
             
             # Determine our IP address - try multiple methods
@@ -1138,10 +1490,10 @@ class VideoInputWithAck(VideoInput):
             print(f"[ACK] IP address set in config: {ip}:{self.listen_port}")
             
             # Save the config
-            config_path = Path(__file__).parent.parent.parent / 'config' / 'controllers.yaml'
-            with open(config_path, 'w') as f:
-                yaml.dump(self.config, f, default_flow_style=False)
-                print(f"[ACK] Updated config saved to {config_path}")
+            if self.save_config():
+                print("[ACK] Updated config saved")
+            else:
+                print("[ACK] Config already up to date")
             
             # Verify the server is actually running
             server_ok = self.verify_server()
@@ -1153,10 +1505,33 @@ class VideoInputWithAck(VideoInput):
             
         except Exception as e:
             print(f"[ERROR] Failed to setup acknowledgment server: {e}")
-            import traceback
-            traceback.print_exc()
+            if logger.isEnabledFor(logging.DEBUG):
+                traceback.print_exc()
             return None
     
+    async def aclose(self):
+        """Close the controller connection, then stop the ACK server and its thread"""
+        await super().aclose()
+        if self._ack_loop is None:
+            return
+        
+        async def stop_server():
+            if self.server is not None:
+                self.server.close()
+                await self.server.wait_closed()
+                self.server = None
+        
+        future = asyncio.run_coroutine_threadsafe(stop_server(), self._ack_loop)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(future), timeout=5)
+        except Exception as e:
+            print(f"[WARNING] Error stopping acknowledgment server: {e}")
+        self._ack_loop.call_soon_threadsafe(self._ack_loop.stop)
+        self._ack_thread.join(timeout=1)
+        if not self._ack_thread.is_alive():
+            self._ack_loop.close()
+        self._ack_loop = None
+    
     def verify_server(self):
         """Verify the server is actually running"""
         if not self.server:
@@ -32,6 +32,13 @@ def test_load_config(video_input):
     assert 'roi_configs' in config['video_input']
     assert 'roi_1' in config['video_input']['roi_configs']
 
+def test_load_config_does_not_rewrite_complete_config(video_input):
+    """Loading a config that already has all ROIs must not touch the file"""
+    config_path = Path(__file__).parent.parent / 'config' / 'controllers.yaml'
+    before = config_path.stat().st_mtime_ns
+    video_input.load_config()
+    assert config_path.stat().st_mtime_ns == before
+
 def test_calculate_movement(video_input, sample_frame):
     """Test movement calculation for a single ROI"""
     roi_config = video_input.roi_configs['roi_1']
@@ -55,6 +62,33 @@ def test_calculate_time_features(video_input):
     # Check they're not both 0
     assert not (t_sin == 0 and t_cos == 0)
 
+def test_scale_movement_log_vec_matches_scalar(video_input):
+    """Vectorized scaling gives the same pot steps as the per-value version"""
+    values = [0.0, -1.0, 0.05, 0.5, 1.0, 3.7, 12.0, 45.0, 99.9, 500.0]
+    expected = [int(round(video_input.scale_movement_log(v, 20, 127))) for v in values]
+    assert video_input.scale_movement_log_vec(values) == expected
+
+def test_background_alpha_diffs_against_running_average(video_input):
+    """With background_alpha set, movement is measured against the running average"""
+    video_input.background_alpha = 0.5
+    dark = np.zeros((10, 10), dtype=np.uint8)
+    bright = np.full((10, 10), 100, dtype=np.uint8)
+    
+    video_input.update_movement_pair(dark)
+    assert video_input._movement_pair is None  # First frame only seeds the background
+    
+    video_input.update_movement_pair(bright)
+    reference, current = video_input._movement_pair
+    assert (reference == 0).all() and current is bright
+    
+    video_input.update_movement_pair(bright)
+    assert (video_input._movement_pair[0] == 50).all()
+    
+    # A resolution change reseeds the background instead of failing every frame
+    video_input.update_movement_pair(np.zeros((20, 20), dtype=np.uint8))
+    assert video_input._movement_pair is None
+    assert video_input._background.shape == (20, 20)
+
 def test_save_movement_vectors(video_input, tmp_path):
     """Test saving movement vectors to CSV"""
     # Modify config to use temporary path
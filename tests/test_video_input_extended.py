@@ -17,7 +17,7 @@ project_root = str(Path(__file__).parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from src.networking.video_input import VideoInputWithAck
+from src.networking.video_input import VideoInputWithAck, install_uvloop, setup_logging
 
 async def test_ack_server():
     """Test that the acknowledgment server works properly"""
@@ -306,7 +306,7 @@ async def test_video_input(fullscreen=False, debug=False, use_video=False, use_r
     
     # Set initial fullscreen state if needed
     if is_fullscreen:
-        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        video.open_window(window_name)
         cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
         print("Window initialized in fullscreen mode")
         
@@ -337,7 +337,7 @@ async def test_video_input(fullscreen=False, debug=False, use_video=False, use_r
             # Helper function to ensure window properties are correctly set
             def apply_fullscreen_state():
                 if is_fullscreen:
-                    cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+                    video.open_window(window_name)
                     cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
                     print("Reapplied fullscreen mode")
             
@@ -438,6 +438,7 @@ async def test_video_input(fullscreen=False, debug=False, use_video=False, use_r
         print(f"\nError in main loop: {e}")
     finally:
         video.close()
+        await video.aclose()
         
     return True
 
@@ -455,6 +456,7 @@ async def main():
     parser.add_argument('--skip-ack-test', action='store_true', help='Skip the acknowledgment server test')
     
     args = parser.parse_args()
+    log_listener = setup_logging(debug=args.debug)
     
     # Run acknowledgment server test first, unless in screen mode or explicitly skipped
     if not args.screen and not args.skip_ack_test:
@@ -477,6 +479,10 @@ async def main():
     except Exception as e:
         print(f"Error running test_video_input: {e}")
         return False
+    finally:
+        log_listener.stop()
 
 if __name__ == "__main__":
+    if install_uvloop():
+        print("Using uvloop event loop")
     asyncio.run(main()) 
\ No newline at end of file